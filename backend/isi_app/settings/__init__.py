@@ -23,3 +23,10 @@ _base_settings = (
 
 # Include settings:
 include(*_base_settings)
+
+# The browsable API is only useful while developing, DEBUG is final only
+# after the environment settings above were included
+if DEBUG:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append(
+        'rest_framework.renderers.BrowsableAPIRenderer'
+    )
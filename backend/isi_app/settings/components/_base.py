@@ -22,3 +22,6 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Seconds between batched updates of single message read marks, 0 applies them immediately
+READ_STATUS_BATCH_INTERVAL = config('READ_STATUS_BATCH_INTERVAL', cast=float, default=0.25)
@@ -0,0 +1,6 @@
+from isi_app.settings import config
+
+# e.g. redis://my_project_redis:6379/0, local memory cache by default
+CACHES = {
+    'default': config.cache('CACHE_URL', default='locmemcache://'),
+}
@@ -8,5 +8,8 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT'),
+        # Keep connections open between requests, 0 closes them after each request
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', cast=int, default=60),
+        'CONN_HEALTH_CHECKS': True,
     },
 }
@@ -1,8 +1,13 @@
 import os
+from importlib import import_module
 
 import django
 import pytest
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, connections
+from django.test import override_settings
 from rest_framework.test import APIClient
 from threads.models import Message, Thread
 
@@ -11,37 +16,105 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "isi_app.settings")
 django.setup()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
+def django_db_modify_db_settings():
+    # Run the suite on an in-memory SQLite database whatever the environment uses,
+    # so commits never wait for the disk. Every xdist worker is a separate process
+    # with its own in-memory database, so no per-worker database names are needed.
+    settings.DATABASES["default"].update(
+        {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+    )
+    # Drop the connection possibly opened with the previous backend
+    del connections["default"]
+
+
+@pytest.fixture(scope="session")
+def django_db_setup(request, django_db_setup, django_db_blocker):
+    # --no-migrations builds the tables from the models, database objects created
+    # by RunPython migrations are added on top
+    if not request.config.getvalue("nomigrations"):
+        return
+    participants_limit = import_module("threads.migrations.0003_thread_participants_limit")
+    with django_db_blocker.unblock(), connection.schema_editor() as schema_editor:
+        participants_limit.create_trigger(None, schema_editor)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def locmem_cache():
+    # Never touch the cache configured for the environment
+    with override_settings(
+        CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(locmem_cache):
+    # Cached rows would outlive the rolled back test transaction
+    cache.clear()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def immediate_read_status():
+    # Background threads cannot see data of the test transaction
+    with override_settings(READ_STATUS_BATCH_INTERVAL=0):
+        yield
+
+
+@pytest.fixture(scope="session", autouse=True)
+def fast_password_hasher():
+    # Password strength is irrelevant for tests, skip the expensive PBKDF2 rounds
+    with override_settings(
+        PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]
+    ):
+        yield
+
+
+@pytest.fixture(scope="module")
 def api_client():
     return APIClient()
 
 
-@pytest.fixture
-def admin_user():
-    return User.objects.create_superuser(
-        username="admin", email="admin@example.com", password="admin"
-    )
+@pytest.fixture(autouse=True)
+def reset_api_client(api_client):
+    # The client is shared by the module, drop the previous test authentication
+    api_client.force_authenticate(user=None)
+    api_client.credentials()
+    api_client.user = None
 
 
-@pytest.fixture
-def user1():
-    return User.objects.create_user(
-        username="user1", email="user1@example.com", password="user1"
-    )
+def create_user(username, **extra_fields):
+    # Clients are authenticated with force_authenticate, so no password is ever checked
+    user = User(username=username, email=f"{username}@example.com", **extra_fields)
+    user.set_unusable_password()
+    user.save()
+    return user
 
 
-@pytest.fixture
-def user2():
-    return User.objects.create_user(
-        username="user2", email="user2@example.com", password="user2"
-    )
+# Users are created once per session outside of the per-test transaction,
+# threads and messages are created per test and rolled back with it.
+@pytest.fixture(scope="session")
+def admin_user(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        return create_user("admin", is_staff=True, is_superuser=True)
 
 
-@pytest.fixture
-def user3():
-    return User.objects.create_user(
-        username="user3", email="user3@example.com", password="user3"
-    )
+@pytest.fixture(scope="session")
+def user1(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        return create_user("user1")
+
+
+@pytest.fixture(scope="session")
+def user2(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        return create_user("user2")
+
+
+@pytest.fixture(scope="session")
+def user3(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        return create_user("user3")
 
 
 @pytest.fixture
@@ -0,0 +1,38 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+
+@pytest.fixture
+def admin_site_client(admin_user):
+    client = Client()
+    client.force_login(admin_user)
+    return client
+
+
+@pytest.mark.django_db
+class TestMessageAdmin:
+    def test_changelist(self, admin_site_client, message):
+        """
+        Test opening the messages changelist.
+        Expected result: The page lists the shortened message text.
+        """
+        response = admin_site_client.get(reverse("admin:threads_message_changelist"))
+
+        assert response.status_code == 200
+        assert message.text in response.content.decode()
+
+    def test_change_view_loads_message_once(self, admin_site_client, message):
+        """
+        Test opening the message change form.
+        Expected result: The full message is loaded with a single query, no deferred fields.
+        """
+        url = reverse("admin:threads_message_change", args=[message.id])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_site_client.get(url)
+
+        assert response.status_code == 200
+        assert len([q for q in queries if 'FROM "threads_message"' in q["sql"]]) == 1
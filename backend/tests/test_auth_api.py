@@ -0,0 +1,54 @@
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from threads.authentication import _decode_token
+from urls import user_threads_url
+
+
+@pytest.mark.django_db
+class TestJWTAuthentication:
+    def test_authenticate_with_token(self, api_client, user1):
+        """
+        Test repeated requests with the same access token.
+        Expected result: Both requests return status 200, the token is decoded only once.
+        """
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user1)}")
+        url = user_threads_url(user1.id)
+        before = _decode_token.cache_info()
+
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+        after = _decode_token.cache_info()
+        assert after.misses - before.misses == 1
+        assert after.hits - before.hits == 1
+
+    def test_authenticate_with_expired_cached_token(self, api_client, user1):
+        """
+        Test a token that expires after it has already been decoded once.
+        Expected result: The request with the expired token returns status 401.
+        """
+        api_client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user1)}")
+        url = user_threads_url(user1.id)
+        assert api_client.get(url).status_code == status.HTTP_200_OK
+
+        later = aware_utcnow() + timedelta(days=1)
+        with mock.patch("threads.authentication.aware_utcnow", return_value=later):
+            response = api_client.get(url)
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_authenticate_with_invalid_token(self, api_client, user1):
+        """
+        Test a malformed access token.
+        Expected result: The request returns status 401.
+        """
+        api_client.credentials(HTTP_AUTHORIZATION="Bearer invalid")
+
+        response = api_client.get(user_threads_url(user1.id))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
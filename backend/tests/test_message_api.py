@@ -1,6 +1,11 @@
 import pytest
-from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from threads.batching import ReadStatusBatcher
+from threads.models import Message, ThreadParticipant
+from threads.services import MessageService, ThreadService
+from urls import message_detail_url, message_list_url
 
 
 @pytest.mark.django_db
@@ -10,7 +15,7 @@ class TestMessageAPI:
         Test creating a new message in a thread.
         Expected result: The message is created successfully with status 201.
         """
-        url = reverse("threads:message-list-create", kwargs={"thread_id": thread.id})
+        url = message_list_url(thread.id)
         data = {"text": "Test message"}
 
         response = authenticated_client.post(url, data)
@@ -18,42 +23,150 @@ class TestMessageAPI:
         assert response.status_code == status.HTTP_201_CREATED
         assert response.data["text"] == "Test message"
 
+    def test_create_message_does_not_fetch_sender(self, authenticated_client, thread):
+        """
+        Test serializing a created message.
+        Expected result: The sender is taken from the request, the users table is not queried.
+        """
+        url = message_list_url(thread.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.post(url, {"text": "Test message"})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert response.data["sender"]["id"] == authenticated_client.user.id
+        assert not any('"auth_user"' in q["sql"] for q in queries)
+
+    def test_create_message_after_leaving_thread(self, authenticated_client, thread):
+        """
+        Test sending a message after the user was removed from the thread.
+        Expected result: The cached participants are invalidated and the request returns 403.
+        """
+        url = message_list_url(thread.id)
+        assert authenticated_client.post(url, {"text": "Hi"}).status_code == status.HTTP_201_CREATED
+
+        ThreadParticipant.objects.filter(thread=thread, user=authenticated_client.user).delete()
+        response = authenticated_client.post(url, {"text": "Hi again"})
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
     def test_list_messages(self, authenticated_client, thread, message):
         """
         Test retrieving a list of messages in a thread.
         Expected result: The request returns status 200 and includes one message.
         """
-        url = reverse("threads:message-list-create", kwargs={"thread_id": thread.id})
+        url = message_list_url(thread.id)
 
         response = authenticated_client.get(url)
 
         assert response.status_code == status.HTTP_200_OK
         assert len(response.data["results"]) == 1
 
+    def test_list_messages_query_count(self, authenticated_client, thread, message, user2):
+        """
+        The number of queries for the messages list must not depend on the number of messages.
+        """
+        url = message_list_url(thread.id)
+        with CaptureQueriesContext(connection) as single:
+            authenticated_client.get(url)
+
+        for sender in (user2, user2, authenticated_client.user):
+            Message.objects.create(thread=thread, sender=sender, text="Another message")
+        with CaptureQueriesContext(connection) as many:
+            response = authenticated_client.get(url)
+
+        assert len(response.data["results"]) == 4
+        assert len(many) == len(single)
+
+    def test_list_messages_cursor_pagination(self, authenticated_client, thread, message, user2):
+        """
+        Test paging through thread messages with a cursor.
+        Expected result: Pages follow creation order and no COUNT query is issued.
+        """
+        for text in ("Second", "Third"):
+            Message.objects.create(thread=thread, sender=user2, text=text)
+
+        with CaptureQueriesContext(connection) as queries:
+            first = authenticated_client.get(message_list_url(thread.id), {"limit": 2})
+        second = authenticated_client.get(first.data["next"])
+
+        assert [m["text"] for m in first.data["results"]] == [message.text, "Second"]
+        assert [m["text"] for m in second.data["results"]] == ["Third"]
+        assert second.data["next"] is None
+        assert not any("COUNT(" in q["sql"] for q in queries)
+
+    def test_list_messages_with_offset(self, authenticated_client, thread, message):
+        """
+        Test paging thread messages with an offset, which the cursor pagination ignores.
+        Expected result: The request returns status 400 instead of repeating the first page.
+        """
+        response = authenticated_client.get(message_list_url(thread.id), {"offset": 20})
+
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "offset" in response.data
+
     def test_mark_message_as_read(self, api_client, thread, message, user2):
         """
         Test marking a specific message as read by another participant in the thread.
         Expected result: The request returns status 204, and the message is marked as read.
         """
         api_client.force_authenticate(user=user2)
-        url = reverse(
-            "threads:message-detail", kwargs={"thread_id": thread.id, "pk": message.id}
-        )
+        url = message_detail_url(thread.id, message.id)
 
         response = api_client.patch(url)
 
         assert response.status_code == status.HTTP_204_NO_CONTENT
-        message.refresh_from_db()
-        assert message.is_read == True
+        assert Message.objects.filter(pk=message.pk).values_list("is_read", flat=True).first() is True
+
+    def test_mark_message_as_read_query_count(self, api_client, thread, message, user2):
+        """
+        Test that the permission check does not load the message thread.
+        Expected result: With cached participants the message is fetched and updated,
+        then the recipients whose unread counters are dropped are selected.
+        """
+        api_client.force_authenticate(user=user2)
+        url = message_detail_url(thread.id, message.id)
+        ThreadService.get_thread_participant_ids(thread.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.patch(url)
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert len(queries) == 3
+
+    def test_admin_mark_message_as_read(self, admin_client, thread, message):
+        """
+        Test an admin marking a message as read in a thread they do not participate in.
+        Expected result: The request returns status 204, and the message is marked as read.
+        """
+        url = message_detail_url(thread.id, message.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = admin_client.patch(url)
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert Message.objects.filter(pk=message.pk).values_list("is_read", flat=True).first() is True
+        update = next(q["sql"] for q in queries if q["sql"].startswith("UPDATE"))
+        assert "threads_thread_participants" not in update
+
+    def test_admin_mark_message_as_read_updates_unread_count(self, admin_client, thread, message, user2):
+        """
+        Test an admin marking a message received by another user as read.
+        Expected result: The recipient's cached unread count drops to zero.
+        """
+        assert MessageService.get_unread_count(user2.id) == 1
+
+        response = admin_client.patch(message_detail_url(thread.id, message.id))
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert MessageService.get_unread_count(user2.id) == 0
 
     def test_mark_own_message_as_read(self, authenticated_client, thread, message):
         """
         Test attempting to mark one's own message as read.
         Expected result: The request returns status 403 (forbidden).
         """
-        url = reverse(
-            "threads:message-detail", kwargs={"thread_id": thread.id, "pk": message.id}
-        )
+        url = message_detail_url(thread.id, message.id)
 
         response = authenticated_client.patch(url)
 
@@ -65,10 +178,44 @@ class TestMessageAPI:
         Expected result: The request returns status 204, and all messages are marked as read.
         """
         api_client.force_authenticate(user=user2)
-        url = reverse("threads:message-list-create", kwargs={"thread_id": thread.id})
+        url = message_list_url(thread.id)
 
         response = api_client.patch(url)
 
         assert response.status_code == status.HTTP_204_NO_CONTENT
-        message.refresh_from_db()
-        assert message.is_read == True
+        assert Message.objects.filter(pk=message.pk).values_list("is_read", flat=True).first() is True
+
+    def test_mark_all_messages_as_read_query_count(self, api_client, thread, message, user2):
+        """
+        Test that marking all thread messages as read does not depend on the number of messages.
+        Expected result: A participant check and a single UPDATE statement.
+        """
+        Message.objects.create(thread=thread, sender=message.sender, text="Another message")
+        api_client.force_authenticate(user=user2)
+        url = message_list_url(thread.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.patch(url)
+
+        assert response.status_code == status.HTTP_204_NO_CONTENT
+        assert len(queries) <= 2
+        assert not Message.objects.filter(thread=thread, is_read=False).exists()
+
+    def test_mark_messages_as_read_in_batch(self, thread, message, user2):
+        """
+        Test read marks collected by the batcher.
+        Expected result: Messages are marked as read with one UPDATE per user on flush.
+        """
+        another = Message.objects.create(thread=thread, sender=message.sender, text="Another message")
+        batcher = ReadStatusBatcher(interval=60)
+        batcher.enqueue(user2.id, message.id)
+        batcher.enqueue(user2.id, another.id)
+        assert not Message.objects.filter(thread=thread, is_read=True).exists()
+
+        with CaptureQueriesContext(connection) as queries:
+            updated = batcher.flush()
+        batcher.stop()
+
+        assert updated == 2
+        assert len([q for q in queries if q["sql"].startswith("UPDATE")]) == 1
+        assert not Message.objects.filter(thread=thread, is_read=False).exists()
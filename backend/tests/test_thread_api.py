@@ -1,7 +1,12 @@
 import pytest
-from django.urls import reverse
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework import status
 from threads.models import Message, Thread
+from threads.serializers import ThreadReadSerializer
+from threads.services import ThreadService
+from urls import THREAD_LIST_URL, thread_detail_url
 
 
 @pytest.mark.django_db
@@ -11,7 +16,7 @@ class TestThreadAPI:
         Create a new chat with another user.
         Expectation: A thread is created with two participants.
         """
-        url = reverse("threads:thread-list-create")
+        url = THREAD_LIST_URL
         data = {"participant_id": user2.id}
         response = authenticated_client.post(url, data)
 
@@ -23,21 +28,76 @@ class TestThreadAPI:
         participant_ids = [p["id"] for p in participants]
         assert authenticated_client.user.id in participant_ids
         assert user2.id in participant_ids
+        assert response.data["last_message_text"] is None
+
+    def test_create_thread_participants_insert(self, authenticated_client, user2):
+        """
+        Create a new chat and inspect the participants table writes.
+        Expectation: Both participants are added with a single INSERT and nothing is deleted.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.post(THREAD_LIST_URL, {"participant_id": user2.id})
+
+        assert response.status_code == status.HTTP_201_CREATED, response.data
+        participant_writes = [
+            q["sql"] for q in queries
+            if q["sql"].startswith(("INSERT", "DELETE")) and "threads_thread_participants" in q["sql"]
+        ]
+        assert len(participant_writes) == 1
+        assert participant_writes[0].startswith("INSERT")
+
+    def test_create_existing_thread(self, authenticated_client, thread, user2, user3):
+        """
+        Creating a chat with a user who already shares a thread with us.
+        Expectation: The existing thread is returned instead of a new one.
+        """
+        Thread.objects.create().participants.set([authenticated_client.user, user3])
+        data = {"participant_id": user2.id}
+        response = authenticated_client.post(THREAD_LIST_URL, data)
+
+        assert response.status_code == status.HTTP_201_CREATED, response.data
+        assert response.data["id"] == thread.id
+        assert Thread.objects.count() == 2
+
+    def test_create_existing_thread_query_count(self, authenticated_client, thread, user2):
+        """
+        Requesting a chat that already exists.
+        Expectation: The thread and its participants are fetched without a separate user lookup.
+        """
+        data = {"participant_id": user2.id}
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.post(THREAD_LIST_URL, data)
+
+        assert response.status_code == status.HTTP_201_CREATED, response.data
+        assert response.data["id"] == thread.id
+        assert len(queries) == 2
+
+    def test_create_thread_with_unknown_user(self, authenticated_client):
+        """
+        Attempting to create a chat with a user that does not exist should return 404.
+        """
+        data = {"participant_id": 0}
+        response = authenticated_client.post(THREAD_LIST_URL, data)
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not Thread.objects.exists()
 
     def test_create_thread_with_self(self, authenticated_client):
         """
-        Attempting to create a chat with oneself should return an error.
+        Attempting to create a chat with oneself should return an error
+        from the serializer validation without querying the database.
         """
-        url = reverse("threads:thread-list-create")
+        url = THREAD_LIST_URL
         data = {"participant_id": authenticated_client.user.id}
-        response = authenticated_client.post(url, data)
+        with CaptureQueriesContext(connection) as queries:
+            response = authenticated_client.post(url, data)
         assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert len(queries) == 0
 
     def test_list_threads(self, authenticated_client, thread):
         """
         Retrieve a list of threads for the authenticated user.
         """
-        url = reverse("threads:thread-list-create")
+        url = THREAD_LIST_URL
         response = authenticated_client.get(url)
 
         assert response.status_code == status.HTTP_200_OK
@@ -46,11 +106,103 @@ class TestThreadAPI:
         thread_ids = [item["id"] for item in response.data["results"]]
         assert thread.id in thread_ids
 
+    def test_list_threads_last_message(self, authenticated_client, thread, message, user2):
+        """
+        Threads in the list include their last message.
+        """
+        last = Message.objects.create(thread=thread, sender=user2, text="Last message")
+        response = authenticated_client.get(THREAD_LIST_URL)
+
+        assert response.status_code == status.HTTP_200_OK
+        item = response.data["results"][0]
+        assert item["last_message_text"] == last.text
+        assert item["last_message_sender_id"] == user2.id
+
+    def test_list_threads_last_message_same_created(self, authenticated_client, thread, message, user2):
+        """
+        Two last messages created at the same time.
+        Expectation: All last message fields come from the newest of them.
+        """
+        last = Message.objects.create(thread=thread, sender=user2, text="Last message")
+        Message.objects.filter(thread=thread).update(created=message.created)
+        response = authenticated_client.get(THREAD_LIST_URL)
+
+        item = response.data["results"][0]
+        assert item["last_message_text"] == last.text
+        assert item["last_message_sender_id"] == user2.id
+
+    def test_serialize_aggregated_participants(self, user1, user2):
+        """
+        Serializing a thread with participants aggregated into arrays, as done on PostgreSQL.
+        Expectation: Participants are built from the arrays without querying the database.
+        """
+        thread = Thread(id=1, created=timezone.now(), updated=timezone.now())
+        thread.participant_ids = [user1.id, user2.id]
+        thread.participant_usernames = [user1.username, user2.username]
+        thread.last_message_text = None
+        thread.last_message_created = None
+        thread.last_message_sender_id = None
+
+        with CaptureQueriesContext(connection) as queries:
+            data = ThreadReadSerializer(thread).data
+
+        assert data["participants"] == [
+            {"id": user1.id, "username": user1.username},
+            {"id": user2.id, "username": user2.username},
+        ]
+        assert len(queries) == 0
+
+    def test_list_threads_query_count(self, authenticated_client, thread, user2, user3):
+        """
+        The number of queries for the threads list must not depend on the number of threads.
+        """
+        url = THREAD_LIST_URL
+        with CaptureQueriesContext(connection) as single:
+            authenticated_client.get(url)
+
+        for participant in (user2, user3, user3):
+            Thread.objects.create().participants.set(
+                [authenticated_client.user, participant]
+            )
+        with CaptureQueriesContext(connection) as many:
+            response = authenticated_client.get(url)
+
+        assert len(response.data["results"]) == 4
+        assert len(many) == len(single)
+
+    def test_participants_cache_follows_m2m_changes(self, user1, user3):
+        """
+        Changing participants with add(), remove() and clear() bypasses the model signals.
+        Expectation: The cached participant IDs are dropped on every change.
+        """
+        thread = Thread.objects.create()
+        thread.participants.add(user1)
+        assert not ThreadService.check_thread_participant(thread.id, user3.id)
+
+        thread.participants.add(user3)
+        assert ThreadService.check_thread_participant(thread.id, user3.id)
+
+        user3.threads.remove(thread)
+        assert not ThreadService.check_thread_participant(thread.id, user3.id)
+
+        assert ThreadService.check_thread_participant(thread.id, user1.id)
+        thread.participants.clear()
+        assert not ThreadService.check_thread_participant(thread.id, user1.id)
+
+    def test_thread_participants_limit(self, thread, user3):
+        """
+        Adding a third participant to a thread.
+        Expectation: The database trigger rejects the row.
+        """
+        with pytest.raises(IntegrityError), transaction.atomic():
+            thread.participants.add(user3)
+        assert thread.participants.count() == 2
+
     def test_delete_thread(self, authenticated_client, thread):
         """
         Deleting a thread when the user is a participant.
         """
-        url = reverse("threads:thread-detail", kwargs={"pk": thread.id})
+        url = thread_detail_url(thread.id)
         response = authenticated_client.delete(url)
 
         assert response.status_code == status.HTTP_204_NO_CONTENT
@@ -63,7 +215,7 @@ class TestThreadAPI:
         Expectation: 403 Forbidden error.
         """
         api_client.force_authenticate(user=user3)
-        url = reverse("threads:thread-detail", kwargs={"pk": thread.id})
+        url = thread_detail_url(thread.id)
         response = api_client.delete(url)
 
         assert response.status_code == status.HTTP_403_FORBIDDEN
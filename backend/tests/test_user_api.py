@@ -1,6 +1,9 @@
 import pytest
-from django.urls import reverse
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
+from threads.services import UserService
+from urls import message_list_url, unread_messages_count_url, user_threads_url
 
 
 @pytest.mark.django_db
@@ -10,7 +13,7 @@ class TestUserAPI:
         Test retrieving a list of threads for the authenticated user.
         Expected result: The request returns status 200 and includes one thread.
         """
-        url = reverse("threads:user-threads", kwargs={"user_id": user1.id})
+        url = user_threads_url(user1.id)
 
         response = authenticated_client.get(url)
 
@@ -22,7 +25,7 @@ class TestUserAPI:
         Test retrieving a list of threads for another user.
         Expected result: The request returns status 403 (forbidden).
         """
-        url = reverse("threads:user-threads", kwargs={"user_id": user2.id})
+        url = user_threads_url(user2.id)
 
         response = authenticated_client.get(url)
 
@@ -33,7 +36,7 @@ class TestUserAPI:
         Test an admin retrieving a list of threads for another user.
         Expected result: The request returns status 200 and includes one thread.
         """
-        url = reverse("threads:user-threads", kwargs={"user_id": user1.id})
+        url = user_threads_url(user1.id)
 
         response = admin_client.get(url)
 
@@ -46,11 +49,67 @@ class TestUserAPI:
         Expected result: The request returns status 200 with the correct unread message count.
         """
         api_client.force_authenticate(user=user2)
-        url = reverse(
-            "threads:user-unread-messages-count", kwargs={"user_id": user2.id}
-        )
+        url = unread_messages_count_url(user2.id)
 
         response = api_client.get(url)
 
         assert response.status_code == status.HTTP_200_OK
         assert response.data["count"] == 1
+
+    def test_get_unread_messages_count_single_query(self, api_client, thread, message, user2):
+        """
+        Test that the unread messages count is computed by the database.
+        Expected result: The request issues exactly one COUNT query.
+        """
+        api_client.force_authenticate(user=user2)
+        url = unread_messages_count_url(user2.id)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+
+        assert response.data["count"] == 1
+        assert len(queries) == 1
+        assert "COUNT(" in queries[0]["sql"]
+
+    def test_unread_messages_count_follows_new_and_read_messages(
+        self, api_client, thread, message, user1, user2
+    ):
+        """
+        Test the cached unread messages count after sending and reading messages.
+        Expected result: The count is updated without querying the database again.
+        """
+        api_client.force_authenticate(user=user2)
+        url = unread_messages_count_url(user2.id)
+        assert api_client.get(url).data["count"] == 1
+
+        api_client.force_authenticate(user=user1)
+        api_client.post(message_list_url(thread.id), {"text": "Another message"})
+        api_client.force_authenticate(user=user2)
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+        assert response.data["count"] == 2
+        assert len(queries) == 0
+
+        api_client.patch(message_list_url(thread.id))
+        with CaptureQueriesContext(connection) as queries:
+            response = api_client.get(url)
+        assert response.data["count"] == 0
+        assert len(queries) == 0
+
+    def test_get_unread_messages_counts_for_several_users(self, thread, message, user1, user2, user3):
+        """
+        Test counting unread messages of several users at once.
+        Expected result: A single GROUP BY query, users without unread messages get zero.
+        """
+        user_ids = [user1.id, user2.id, user3.id]
+
+        with CaptureQueriesContext(connection) as queries:
+            counts = UserService.get_unread_counts(user_ids)
+        assert counts == {user1.id: 0, user2.id: 1, user3.id: 0}
+        assert len(queries) == 1
+
+        # The counters are cached for the single user endpoint as well
+        with CaptureQueriesContext(connection) as queries:
+            assert UserService.get_unread_counts(user_ids) == counts
+            assert UserService.get_user_unread_messages_count(user2.id) == 1
+        assert len(queries) == 0
@@ -0,0 +1,26 @@
+from django.urls import reverse
+
+# Resolved once, the list URL takes no arguments
+THREAD_LIST_URL = reverse("threads:thread-list-create")
+
+
+def thread_detail_url(thread_id):
+    return reverse("threads:thread-detail", kwargs={"pk": thread_id})
+
+
+def message_list_url(thread_id):
+    return reverse("threads:message-list-create", kwargs={"thread_id": thread_id})
+
+
+def message_detail_url(thread_id, message_id):
+    return reverse(
+        "threads:message-detail", kwargs={"thread_id": thread_id, "pk": message_id}
+    )
+
+
+def user_threads_url(user_id):
+    return reverse("threads:user-threads", kwargs={"user_id": user_id})
+
+
+def unread_messages_count_url(user_id):
+    return reverse("threads:user-unread-messages-count", kwargs={"user_id": user_id})
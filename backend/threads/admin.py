@@ -1,6 +1,17 @@
 from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db.models import Prefetch
+from django.db.models.functions import Substr
 from django.utils.translation import gettext_lazy as _
-from .models import Thread, Message
+from .models import Thread, Message, ThreadParticipant
+from .services import MessageService
+
+class ThreadParticipantInline(admin.TabularInline):
+    # Participants go through an explicit model, so they are edited inline
+    model = ThreadParticipant
+    extra = 0
+    max_num = 2
+    raw_id_fields = ('user',)
 
 class ThreadAdmin(admin.ModelAdmin):
     # Fields to display in the list view
@@ -11,6 +22,15 @@ class ThreadAdmin(admin.ModelAdmin):
     search_fields = ('participants__username',)
     # Default ordering
     ordering = ('-created',)
+    inlines = [ThreadParticipantInline]
+
+    def get_queryset(self, request):
+        """
+        Prefetches participant usernames for the whole changelist page.
+        """
+        return super().get_queryset(request).prefetch_related(
+            Prefetch('participants', queryset=User.objects.only('id', 'username'))
+        )
 
     def get_participants(self, obj):
         """
@@ -31,19 +51,46 @@ class MessageAdmin(admin.ModelAdmin):
     # Add custom admin actions
     actions = ['mark_as_read', 'mark_as_unread']
 
+    def get_queryset(self, request):
+        """
+        Loads only the displayed columns and cuts the message text in the database
+        for the changelist, the other views need the full message.
+        """
+        # The sender and thread are displayed by every view
+        queryset = super().get_queryset(request).select_related('sender', 'thread')
+        resolver_match = request.resolver_match
+        if resolver_match is None or not resolver_match.url_name.endswith('_changelist'):
+            return queryset
+        return (
+            queryset
+            .annotate(short=Substr('text', 1, 50))
+            .only('id', 'is_read', 'created', 'sender__username', 'thread__id')
+        )
+
     def short_text(self, obj):
         """
         Returns a shortened version of the message text (first 50 characters).
         """
-        return obj.text[:50]
+        return obj.short
     short_text.short_description = _('Text')
 
+    def _invalidate_unread_counts(self, queryset):
+        """
+        Drops cached unread counters of all participants of the affected threads.
+        """
+        MessageService.invalidate_unread_counts(
+            ThreadParticipant.objects.filter(thread_id__in=queryset.values('thread_id'))
+            .values_list('user_id', flat=True)
+            .distinct()
+        )
+
     @admin.action(description=_("Mark selected messages as read"))
     def mark_as_read(self, request, queryset):
         """
         Admin action to mark selected messages as read.
         """
         updated = queryset.update(is_read=True)
+        self._invalidate_unread_counts(queryset)
         self.message_user(request, _(f"{updated} messages marked as read."))
 
     @admin.action(description=_("Mark selected messages as unread"))
@@ -52,6 +99,7 @@ class MessageAdmin(admin.ModelAdmin):
         Admin action to mark selected messages as unread.
         """
         updated = queryset.update(is_read=False)
+        self._invalidate_unread_counts(queryset)
         self.message_user(request, _(f"{updated} messages marked as unread."))
 
 # Register the models with their respective admin classes
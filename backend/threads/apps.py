@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ThreadsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'threads'
+
+    def ready(self):
+        from . import signals  # noqa: F401
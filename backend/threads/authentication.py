@@ -0,0 +1,31 @@
+from functools import lru_cache
+
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+@lru_cache(maxsize=1024)
+def _decode_token(raw_token: bytes) -> Token:
+    # Invalid tokens raise and are therefore never cached
+    return JWTAuthentication().get_validated_token(raw_token)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that decodes each raw token only once per process"""
+
+    def get_validated_token(self, raw_token: bytes) -> Token:
+        validated_token = _decode_token(raw_token)
+        # Cached tokens were validated in the past, the expiration must be rechecked
+        try:
+            validated_token.check_exp(current_time=aware_utcnow())
+        except TokenError as e:
+            raise InvalidToken(e.args[0]) from e
+        return validated_token
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    """Document the cached authentication as the regular JWT bearer scheme"""
+    target_class = CachedJWTAuthentication
@@ -0,0 +1,102 @@
+import atexit
+import logging
+import queue
+import threading
+from collections import defaultdict
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+
+from .services import MessageService
+
+logger = logging.getLogger(__name__)
+
+
+class ReadStatusBatcher:
+    """
+    Collect single message read marks and apply them with one UPDATE per user
+    Note:
+        Pending marks are flushed every `interval` seconds by a daemon thread.
+        Without an interval marks are applied right away in the calling thread.
+    """
+
+    def __init__(self, interval: Optional[float] = None, max_pending: int = 10000):
+        self._interval = interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+
+    @property
+    def interval(self) -> float:
+        if self._interval is not None:
+            return self._interval
+        return settings.READ_STATUS_BATCH_INTERVAL
+
+    def enqueue(self, user_id: int, message_id: int) -> None:
+        """
+        Schedule a message to be marked as read
+        Args:
+            user_id: ID of user marking the message as read
+            message_id: Message ID, permissions must be checked by the caller
+        """
+        if not self.interval:
+            MessageService.mark_messages_as_read(user_id, [message_id])
+            return
+        try:
+            self._queue.put_nowait((user_id, message_id))
+        except queue.Full:
+            # Apply the mark in the request thread rather than dropping it
+            MessageService.mark_messages_as_read(user_id, [message_id])
+            return
+        self._ensure_worker()
+
+    def flush(self) -> int:
+        """
+        Apply all pending marks
+        Returns:
+            Number of updated messages
+        """
+        pending = defaultdict(list)
+        while True:
+            try:
+                user_id, message_id = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            pending[user_id].append(message_id)
+
+        updated = 0
+        for user_id, message_ids in pending.items():
+            updated += MessageService.mark_messages_as_read(user_id, message_ids)
+        return updated
+
+    def stop(self) -> None:
+        """Stop the worker and apply the remaining marks"""
+        self._stopped.set()
+        if self._worker is not None:
+            self._worker.join()
+        self.flush()
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="read-status-batcher", daemon=True
+                )
+                self._worker.start()
+                atexit.register(self.stop)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to apply pending read marks")
+            finally:
+                close_old_connections()
+
+
+read_status_batcher = ReadStatusBatcher()
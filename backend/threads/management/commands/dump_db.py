@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand
 from django.core.management import call_command
 from datetime import datetime
+import gzip
 import os
 
 
@@ -18,7 +19,9 @@ class Command(BaseCommand):
         output = options['output']
         if not output:
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            output = f'db_dump_{timestamp}.json'
+            output = f'db_dump_{timestamp}.json.gz'
+        elif not output.endswith('.gz'):
+            output += '.gz'
 
         # Ensure dumps directory exists
         dumps_dir = 'dumps'
@@ -29,13 +32,14 @@ class Command(BaseCommand):
 
         self.stdout.write(f'Creating database dump to {output_path}...')
 
-        # Create dump
-        with open(output_path, 'w') as f:
-            call_command('dumpdata', 
-                        'auth.user', 
-                        'threads.thread', 
+        # Create compressed dump, a low compression level keeps it IO bound.
+        # loaddata reads .json.gz fixtures as is.
+        with gzip.open(output_path, 'wt', compresslevel=3) as f:
+            call_command('dumpdata',
+                        'auth.user',
+                        'threads.thread',
+                        'threads.threadparticipant',
                         'threads.message',
-                        indent=2,
                         stdout=f)
 
         self.stdout.write(self.style.SUCCESS(f'Database dump created successfully at {output_path}')) 
\ No newline at end of file
@@ -1,7 +1,8 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
-from threads.models import Thread, Message
+from threads.models import Thread, Message, ThreadParticipant
 from django.utils import timezone
 
 
@@ -11,31 +12,41 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         self.stdout.write('Creating test data...')
 
+        # Seeded passwords are public anyway, hash them cheaply in debug mode
+        hasher = 'default'
+        if settings.DEBUG and 'django.contrib.auth.hashers.MD5PasswordHasher' in settings.PASSWORD_HASHERS:
+            hasher = 'md5'
+
         # Create users
         admin, created = User.objects.get_or_create(
             username='admin',
             email='admin@example.com',
-            defaults={'password': make_password('admin'), 'is_staff': True, 'is_superuser': True}
+            defaults={'password': make_password('admin', hasher=hasher), 'is_staff': True, 'is_superuser': True}
         )
 
         user1, created = User.objects.get_or_create(
             username='user1',
             email='user1@example.com',
-            defaults={'password': make_password('user1')}
+            defaults={'password': make_password('user1', hasher=hasher)}
         )
 
         user2, created = User.objects.get_or_create(
             username='user2',
             email='user2@example.com',
-            defaults={'password': make_password('user2')}
+            defaults={'password': make_password('user2', hasher=hasher)}
         )
 
         # Create threads
         thread1 = Thread.objects.create()
-        thread1.participants.set([user1, user2])
-
         thread2 = Thread.objects.create()
-        thread2.participants.set([user1, user2])
+
+        # Add participants to all threads with a single INSERT
+        ThreadParticipant.objects.bulk_create([
+            ThreadParticipant(thread=thread1, user=user1),
+            ThreadParticipant(thread=thread1, user=user2),
+            ThreadParticipant(thread=thread2, user=user1),
+            ThreadParticipant(thread=thread2, user=user2),
+        ], ignore_conflicts=True)
 
         # Create messages
         Message.objects.create(
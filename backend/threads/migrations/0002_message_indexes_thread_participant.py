@@ -0,0 +1,64 @@
+# Generated by Django 5.1.6 on 2026-10-15 11:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('threads', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # The auto-created participants table already matches the explicit
+        # through model, only the migration state has to be switched over.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ThreadParticipant',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('thread', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='threads.thread')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'threads_thread_participants',
+                        'unique_together': {('thread', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='thread',
+                    name='participants',
+                    field=models.ManyToManyField(related_name='threads', through='threads.ThreadParticipant', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='threadparticipant',
+            index=models.Index(fields=['user', 'thread'], name='threads_thr_user_id_1bf469_idx'),
+        ),
+        migrations.AlterModelOptions(
+            name='message',
+            options={'ordering': ['created']},
+        ),
+        migrations.AlterModelOptions(
+            name='thread',
+            options={'ordering': ['created']},
+        ),
+        migrations.AlterField(
+            model_name='message',
+            name='text',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(fields=['thread', 'created'], name='threads_mes_thread__47f71a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='message',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['thread', 'is_read'], name='msg_unread_idx'),
+        ),
+    ]
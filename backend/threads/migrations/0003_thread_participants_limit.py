@@ -0,0 +1,68 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD = """
+CREATE OR REPLACE FUNCTION check_thread_participants() RETURNS trigger AS $$
+BEGIN
+    IF (
+        SELECT COUNT(*) FROM threads_thread_participants WHERE thread_id = NEW.thread_id
+    ) >= 2 THEN
+        RAISE EXCEPTION 'Thread cannot have more than 2 participants'
+            USING ERRCODE = 'check_violation';
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER thread_participants_limit
+    BEFORE INSERT ON threads_thread_participants
+    FOR EACH ROW EXECUTE FUNCTION check_thread_participants();
+"""
+
+POSTGRESQL_BACKWARD = """
+DROP TRIGGER IF EXISTS thread_participants_limit ON threads_thread_participants;
+DROP FUNCTION IF EXISTS check_thread_participants();
+"""
+
+SQLITE_FORWARD = """
+CREATE TRIGGER thread_participants_limit
+    BEFORE INSERT ON threads_thread_participants
+    WHEN (
+        SELECT COUNT(*) FROM threads_thread_participants WHERE thread_id = NEW.thread_id
+    ) >= 2
+BEGIN
+    SELECT RAISE(ABORT, 'Thread cannot have more than 2 participants');
+END;
+"""
+
+SQLITE_BACKWARD = """
+DROP TRIGGER IF EXISTS thread_participants_limit;
+"""
+
+SQL = {
+    'postgresql': (POSTGRESQL_FORWARD, POSTGRESQL_BACKWARD),
+    'sqlite': (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def create_trigger(apps, schema_editor):
+    forward, _ = SQL.get(schema_editor.connection.vendor, (None, None))
+    if forward:
+        schema_editor.execute(forward)
+
+
+def drop_trigger(apps, schema_editor):
+    _, backward = SQL.get(schema_editor.connection.vendor, (None, None))
+    if backward:
+        schema_editor.execute(backward)
+
+
+class Migration(migrations.Migration):
+    """Limit thread participants to two at the database level"""
+
+    dependencies = [
+        ('threads', '0002_message_indexes_thread_participant'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
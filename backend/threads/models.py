@@ -1,35 +1,40 @@
 from django.contrib.auth.models import User
-from django.core.exceptions import ValidationError
 from django.db import models
-from django.utils.translation import gettext_lazy as _
 
 
 class Thread(models.Model):
-    participants = models.ManyToManyField(User, related_name='threads')
+    participants = models.ManyToManyField(
+        User, related_name='threads', through='ThreadParticipant'
+    )
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
 
     class Meta:
+        # Check constraints cannot span the M2M table, the participants limit
+        # is enforced by a trigger on it (see migration 0003)
         ordering = ['created']
-        # SQLite3 do not support CheckConstraint
-        # constraints = [
-        #     models.CheckConstraint(
-        #         check=models.Q(participants__exact=2),
-        #         name='exact_two_participants'
-        #     )
-        # ]
-
-    def clean(self):
-        super().clean()
-        if self.participants.count() != 2:
-            raise ValidationError(_('Thread must have exactly 2 participants.'))
-        if self.participants.filter(id=self.participants.first().id).count() > 1:
-            raise ValidationError(_('User cannot create a chat with themselves.'))
 
     def __str__(self):
         return f"Thread - {self.id}"
 
 
+class ThreadParticipant(models.Model):
+    thread = models.ForeignKey(Thread, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    class Meta:
+        # Keep the table of the former auto-created through model
+        db_table = 'threads_thread_participants'
+        unique_together = [('thread', 'user')]
+        indexes = [
+            # User threads lookups, (thread, user) is covered by the unique constraint
+            models.Index(fields=['user', 'thread']),
+        ]
+
+    def __str__(self):
+        return f"Thread - {self.thread_id} - User - {self.user_id}"
+
+
 class Message(models.Model):
     thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name='messages')
     sender = models.ForeignKey(User, on_delete=models.CASCADE, related_name='messages')
@@ -39,6 +44,17 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['created']
+        indexes = [
+            # Thread messages list ordered by creation date
+            models.Index(fields=['thread', 'created']),
+            # Unread messages lookups excluding own messages, is_read is constant
+            # under the condition; partial index ignored by backends without support
+            models.Index(
+                fields=['thread', 'sender'],
+                condition=models.Q(is_read=False),
+                name='msg_unread_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"Message - {self.id} - {self.sender} - {self.thread}"
@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class MessageCursorPagination(CursorPagination):
+    """
+    Keyset pagination for thread messages
+    Note:
+        Pages are fetched by `created` through the (thread, created) index,
+        without COUNT(*) and OFFSET scans on long threads
+    """
+    ordering = "created"
+    page_size_query_param = "limit"
+    max_page_size = 100
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
 
 from .models import Message, Thread
@@ -27,13 +28,39 @@ class ThreadCreateSerializer(serializers.Serializer):
 
 
 class ThreadReadSerializer(serializers.ModelSerializer):
-    participants = UserSerializer(many=True, read_only=True)
+    participants = serializers.SerializerMethodField()
+    # Annotated by the thread queries, null for a thread without messages
+    last_message_text = serializers.CharField(read_only=True, allow_null=True)
+    last_message_created = serializers.DateTimeField(read_only=True, allow_null=True)
+    last_message_sender_id = serializers.IntegerField(read_only=True, allow_null=True)
 
     class Meta:
         model = Thread
-        fields = ("id", "participants", "created", "updated")
+        fields = (
+            "id",
+            "participants",
+            "last_message_text",
+            "last_message_created",
+            "last_message_sender_id",
+            "created",
+            "updated",
+        )
         read_only_fields = fields
 
+    @extend_schema_field(UserSerializer(many=True))
+    def get_participants(self, obj):
+        if hasattr(obj, "participant_ids"):
+            # Aggregated by the threads query on PostgreSQL
+            return [
+                {"id": user_id, "username": username}
+                for user_id, username in zip(obj.participant_ids, obj.participant_usernames)
+            ]
+        # Built from the prefetched users without a nested serializer per participant
+        return [
+            {"id": user.id, "username": user.username}
+            for user in obj.participants.all()
+        ]
+
 
 class MessageCreateSerializer(serializers.Serializer):
     text = serializers.CharField(max_length=1000)
@@ -52,3 +79,15 @@ class ThreadQueryParamsSerializer(serializers.Serializer):
     limit = serializers.IntegerField(required=False, min_value=1)
     offset = serializers.IntegerField(required=False, min_value=0)
     ordering = serializers.CharField(required=False)
+
+
+class MessageQueryParamsSerializer(serializers.Serializer):
+    limit = serializers.IntegerField(required=False, min_value=1)
+
+    def validate(self, attrs):
+        # Messages are paginated with a cursor, an ignored offset would repeat the first page
+        if "offset" in self.initial_data:
+            raise serializers.ValidationError(
+                {"offset": "Not supported, follow the `next` link to get the next page"}
+            )
+        return attrs
@@ -2,15 +2,40 @@ import logging
 from typing import Optional, Type
 
 from django.contrib.auth import get_user_model
-from django.db import transaction
-from django.db.models import Count, QuerySet
+from django.contrib.postgres.aggregates import ArrayAgg
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import (Count, F, OuterRef, Prefetch, QuerySet, Subquery,
+                              prefetch_related_objects)
 
-from .models import Message, Thread, User
+from .models import Message, Thread, ThreadParticipant, User
 
 logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+THREAD_PARTICIPANTS_CACHE_KEY = 'thread:{thread_id}:participants'
+THREAD_PARTICIPANTS_CACHE_TIMEOUT = 60 * 60
+# Counters are adjusted in place, the timeout bounds drift from changes made elsewhere (admin)
+UNREAD_COUNT_CACHE_KEY = 'unread:{user_id}'
+UNREAD_COUNT_CACHE_TIMEOUT = 5 * 60
+
+
+def _participants_prefetch() -> Prefetch:
+    """Prefetch thread participants limited to the serialized user fields"""
+    return Prefetch('participants', queryset=User.objects.only('id', 'username'))
+
+
+def _annotate_last_message(threads: QuerySet[Thread]) -> QuerySet[Thread]:
+    """Annotate threads with their last message fields using correlated subqueries"""
+    # The id breaks ties of equal timestamps, so every subquery picks the same message
+    last_message = Message.objects.filter(thread=OuterRef('pk')).order_by('-created', '-id')
+    return threads.annotate(
+        last_message_text=Subquery(last_message.values('text')[:1]),
+        last_message_created=Subquery(last_message.values('created')[:1]),
+        last_message_sender_id=Subquery(last_message.values('sender_id')[:1]),
+    )
+
 
 class ThreadValidationError(Exception):
     def __init__(self):
@@ -31,13 +56,15 @@ class ThreadService:
         Returns:
             Thread if exists, None otherwise
         """
-        return (
-            Thread.objects.filter(participants__id__in=[user_id, participant_id])
-            .annotate(participant_count=Count('participants'))
-            .filter(participant_count=2)
-            .prefetch_related('participants')
-            .first()
+        # Separate filters join the participants table once per user. Threads are
+        # limited to two participants by a database trigger, so a thread having
+        # both users is their private thread and no participant count is needed.
+        threads = (
+            Thread.objects.filter(participants__id=user_id)
+            .filter(participants__id=participant_id)
+            .prefetch_related(_participants_prefetch())
         )
+        return _annotate_last_message(threads).first()
 
     @staticmethod
     def create_thread_with_participant(
@@ -50,25 +77,75 @@ class ThreadService:
             creator_id: User who creates the thread
             participant_id: User to create thread with
         Returns:
-            Created Thread instance
+            Created Thread instance with prefetched participants
         """
         with transaction.atomic():
             thread = Thread.objects.create()
-            thread.participants.set([creator_id, participant_id])
+            # The serializer guarantees two distinct users and the thread is new,
+            # so neither the unique constraint nor the participants limit can fail
+            ThreadParticipant.objects.bulk_create(
+                [
+                    ThreadParticipant(thread=thread, user_id=creator_id),
+                    ThreadParticipant(thread=thread, user_id=participant_id),
+                ]
+            )
             logger.info(
                 f"Created new thread {thread.id} between users {creator_id} and {participant_id}"
             )
-            return thread
+        # bulk_create sends no signals, an empty list may have been cached for this ID
+        ThreadService.invalidate_thread_participants(thread.id)
+        prefetch_related_objects([thread], _participants_prefetch())
+        return thread
 
     @staticmethod
-    def get_user_threads(user_id: int) -> QuerySet[Thread]:
-        """Get all user threads with optimized queries"""
-        return (
-            Thread.objects.filter(participants__id=user_id)
-            .prefetch_related('participants')
-            .order_by('-updated')
+    def get_thread_participant_ids(thread_id: int) -> list[int]:
+        """
+        Get thread participant IDs
+        Note:
+            Cached until the participants change, an empty list for unknown threads
+        """
+        return cache.get_or_set(
+            THREAD_PARTICIPANTS_CACHE_KEY.format(thread_id=thread_id),
+            lambda: list(
+                ThreadParticipant.objects.filter(thread_id=thread_id)
+                .values_list('user_id', flat=True)
+            ),
+            THREAD_PARTICIPANTS_CACHE_TIMEOUT,
         )
 
+    @staticmethod
+    def invalidate_thread_participants(thread_id: int) -> None:
+        """Drop cached thread participant IDs"""
+        cache.delete(THREAD_PARTICIPANTS_CACHE_KEY.format(thread_id=thread_id))
+
+    @staticmethod
+    def check_thread_participant(thread_id: int, user_id: int) -> bool:
+        """Check if user is thread participant using the cached participant IDs"""
+        return user_id in ThreadService.get_thread_participant_ids(thread_id)
+
+    @staticmethod
+    def get_user_threads(user_id: int) -> QuerySet[Thread]:
+        """
+        Get all user threads with their participants and last message
+        Note:
+            On PostgreSQL participants are aggregated into `participant_ids` and
+            `participant_usernames` arrays in the same query, other databases
+            fall back to a prefetch
+        """
+        threads = Thread.objects.all()
+        if connection.vendor == 'postgresql':
+            # Annotated before filtering by user, otherwise only that user is aggregated
+            threads = threads.annotate(
+                participant_ids=ArrayAgg('participants__id', ordering='participants__id'),
+                participant_usernames=ArrayAgg(
+                    'participants__username', ordering='participants__id'
+                ),
+            )
+        else:
+            threads = threads.prefetch_related(_participants_prefetch())
+        threads = _annotate_last_message(threads)
+        return threads.filter(participants__id=user_id).order_by('-updated')
+
 
 class MessageService:
     model: Type[Message] = Message
@@ -81,32 +158,61 @@ class MessageService:
                 sender_id=sender_id, thread_id=thread_id, text=text
             )
             logger.info(f"Created new message {message.id} in thread {thread_id}")
-            return message
+        for user_id in ThreadService.get_thread_participant_ids(thread_id):
+            if user_id != sender_id:
+                MessageService._change_unread_count(user_id, 1)
+        return message
 
     @staticmethod
     def check_thread_participant(thread_id: int, user_id: int) -> bool:
-        """Check if user is thread participant (optimized query)"""
-        return Thread.objects.filter(
-            id=thread_id,
-            participants__id=user_id
-        ).exists()
+        """Check if user is thread participant"""
+        return ThreadService.check_thread_participant(thread_id, user_id)
 
     @staticmethod
-    def mark_messages_as_read(user_id: int, message_ids: list[int]) -> None:
+    def mark_messages_as_read(user_id: int, message_ids: list[int]) -> int:
         """
-        Mark messages as read
+        Mark messages as read with a single UPDATE
         Args:
             user_id: ID of user marking messages as read
             message_ids: List of message IDs to mark as read
+        Returns:
+            Number of updated messages
         Note:
-            Only message recipient or admin can mark messages as read
+            Only message recipient or admin can mark messages as read,
+            this must be checked by the caller (see `can_mark_message_as_read`)
         """
-        with transaction.atomic():
-            Message.objects.filter(
-                id__in=message_ids,
-                thread__participants__id=user_id,  # User must be thread participant
-                is_read=False,  # Only update unread messages
-            ).exclude(sender_id=user_id).update(is_read=True)
+        updated = Message.objects.filter(
+            id__in=message_ids,
+            is_read=False,  # Only update unread messages
+        ).exclude(sender_id=user_id).update(is_read=True)
+        if updated:
+            # Admins may mark messages of other users, recount for every recipient
+            MessageService.invalidate_unread_counts(
+                ThreadParticipant.objects.filter(thread__messages__id__in=message_ids)
+                .values_list('user_id', flat=True)
+                .distinct()
+            )
+        return updated
+
+    @staticmethod
+    def mark_thread_messages_as_read(thread_id: int, user_id: int) -> int:
+        """
+        Mark all thread messages received by user as read with a single UPDATE
+        Args:
+            thread_id: Thread ID
+            user_id: ID of user marking messages as read
+        Returns:
+            Number of updated messages
+        Note:
+            Thread participation must be checked by the caller
+        """
+        updated = Message.objects.filter(
+            thread_id=thread_id,
+            is_read=False,
+        ).exclude(sender_id=user_id).update(is_read=True)
+        if updated:
+            MessageService._change_unread_count(user_id, -updated)
+        return updated
 
     @staticmethod
     def can_mark_message_as_read(user: User, message: Message) -> bool:
@@ -117,21 +223,81 @@ class MessageService:
             message: Message to mark as read
         Returns:
             True if user is message recipient or admin
+        Note:
+            Uses the cached participant IDs, `message.thread` is never loaded
         """
         return user.is_staff or (
             message.sender_id != user.id and
-            message.thread.participants.filter(id=user.id).exists()
+            user.id in ThreadService.get_thread_participant_ids(message.thread_id)
         )
 
     @staticmethod
     def get_unread_count(user_id: int) -> int:
-        """Get unread messages count (optimized query)"""
-        return Message.objects.filter(
-            thread__participants__id=user_id,
-            is_read=False
-        ).exclude(
-            sender_id=user_id
-        ).count()
+        """
+        Get unread messages count
+        Note:
+            Served from a cached counter, a cache miss runs a single SELECT COUNT(*)
+        """
+        key = UNREAD_COUNT_CACHE_KEY.format(user_id=user_id)
+        count = cache.get(key)
+        if count is None:
+            count = Message.objects.filter(
+                thread__participants__id=user_id,
+                is_read=False
+            ).exclude(
+                sender_id=user_id
+            ).count()
+            cache.set(key, count, UNREAD_COUNT_CACHE_TIMEOUT)
+        return count
+
+    @staticmethod
+    def get_unread_counts(user_ids: list[int]) -> dict[int, int]:
+        """
+        Get unread messages counts of several users
+        Args:
+            user_ids: User IDs to get counts for
+        Returns:
+            Mapping of user ID to number of unread messages
+        Note:
+            Cached counters are reused, the missing ones are counted with a
+            single GROUP BY query
+        """
+        keys = {user_id: UNREAD_COUNT_CACHE_KEY.format(user_id=user_id) for user_id in user_ids}
+        cached = cache.get_many(keys.values())
+        counts = {
+            user_id: cached[key] for user_id, key in keys.items() if key in cached
+        }
+        missing = [user_id for user_id in keys if user_id not in counts]
+        if missing:
+            rows = (
+                Message.objects.filter(is_read=False, thread__participants__id__in=missing)
+                .annotate(participant_id=F('thread__participants__id'))
+                .exclude(sender_id=F('participant_id'))
+                .values('participant_id')
+                .annotate(count=Count('id'))
+            )
+            counted = {row['participant_id']: row['count'] for row in rows}
+            # Users without unread messages get no row
+            missing_counts = {user_id: counted.get(user_id, 0) for user_id in missing}
+            cache.set_many(
+                {keys[user_id]: count for user_id, count in missing_counts.items()},
+                UNREAD_COUNT_CACHE_TIMEOUT,
+            )
+            counts.update(missing_counts)
+        return counts
+
+    @staticmethod
+    def invalidate_unread_counts(user_ids: list[int]) -> None:
+        """Drop cached unread counters, they are recounted on the next read"""
+        cache.delete_many([UNREAD_COUNT_CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+    @staticmethod
+    def _change_unread_count(user_id: int, delta: int) -> None:
+        try:
+            cache.incr(UNREAD_COUNT_CACHE_KEY.format(user_id=user_id), delta)
+        except ValueError:
+            # Not cached, the next read counts from the database
+            pass
 
     @staticmethod
     def get_thread_messages(thread_id: int) -> QuerySet[Message]:
@@ -139,6 +305,10 @@ class MessageService:
         return (
             Message.objects.filter(thread_id=thread_id)
             .select_related('sender')
+            .only(
+                'id', 'text', 'thread_id', 'created', 'is_read',
+                'sender__id', 'sender__username',
+            )
             .order_by('created')
         )
 
@@ -153,11 +323,7 @@ class UserService:
         Returns:
             QuerySet of threads
         """
-        return (
-            Thread.objects.filter(participants__id=user_id)
-            .prefetch_related('participants')
-            .order_by('-updated')
-        )
+        return ThreadService.get_user_threads(user_id)
 
     @staticmethod
     def get_user_unread_messages_count(user_id: int) -> int:
@@ -168,9 +334,15 @@ class UserService:
         Returns:
             Number of unread messages
         """
-        return Message.objects.filter(
-            thread__participants__id=user_id,
-            is_read=False
-        ).exclude(
-            sender_id=user_id
-        ).count()
+        return MessageService.get_unread_count(user_id)
+
+    @staticmethod
+    def get_unread_counts(user_ids: list[int]) -> dict[int, int]:
+        """
+        Get numbers of unread messages for several users at once
+        Args:
+            user_ids: User IDs to get counts for
+        Returns:
+            Mapping of user ID to number of unread messages
+        """
+        return MessageService.get_unread_counts(user_ids)
@@ -0,0 +1,38 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Thread, ThreadParticipant
+from .services import MessageService, ThreadService
+
+
+def _invalidate_participation(thread_ids, user_ids) -> None:
+    for thread_id in thread_ids:
+        ThreadService.invalidate_thread_participants(thread_id)
+    # Joining or leaving a thread changes the messages counted as unread
+    MessageService.invalidate_unread_counts(list(user_ids))
+
+
+@receiver(post_save, sender=ThreadParticipant)
+@receiver(post_delete, sender=ThreadParticipant)
+def invalidate_thread_participants(sender, instance: ThreadParticipant, **kwargs):
+    """Drop cached participants when they change outside of ThreadService (admin, cascades)"""
+    _invalidate_participation([instance.thread_id], [instance.user_id])
+
+
+@receiver(m2m_changed, sender=Thread.participants.through)
+def invalidate_thread_participants_m2m(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached participants changed with add(), set(), remove() or clear(), which skip model signals"""
+    if action == 'pre_clear':
+        # The cleared rows are only known before they are deleted
+        related = instance.threads if reverse else instance.participants
+        instance._cleared_participation_ids = list(related.values_list('id', flat=True))
+        return
+    if action == 'post_clear':
+        pk_set = instance.__dict__.pop('_cleared_participation_ids', [])
+    elif action not in ('post_add', 'post_remove'):
+        return
+    if reverse:
+        # user.threads.add(...), pk_set holds thread IDs
+        _invalidate_participation(pk_set, [instance.pk])
+    else:
+        _invalidate_participation([instance.pk], pk_set)
@@ -8,11 +8,13 @@ from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.validators import ValidationError
 
+from .batching import read_status_batcher
 from .models import Message, Thread
+from .pagination import MessageCursorPagination
 from .permissions import IsAdmin, IsParticipant
-from .serializers import (MessageCreateSerializer, MessageReadSerializer,
-                          ThreadCreateSerializer, ThreadQueryParamsSerializer,
-                          ThreadReadSerializer)
+from .serializers import (MessageCreateSerializer, MessageQueryParamsSerializer,
+                          MessageReadSerializer, ThreadCreateSerializer,
+                          ThreadQueryParamsSerializer, ThreadReadSerializer)
 from .services import (MessageService, ThreadService, ThreadValidationError,
                        UserService)
 
@@ -112,19 +114,19 @@ class ThreadListCreateAPI(generics.ListCreateAPIView):
 
         participant_id = serializer.validated_data["participant_id"]
 
-        # Check if participant exists
-        if not User.objects.filter(id=participant_id).exists():
-            return response.Response(
-                {"detail": "Participant not found"}, status=status.HTTP_404_NOT_FOUND
-            )
-
         try:
-            # Try to get existing thread
+            # Try to get existing thread, its participants are known to exist
             thread = self.service.get_thread_by_participants(
                 user_id=request.user.id, participant_id=participant_id
             )
 
             if thread is None:
+                # Check if participant exists only before creating a thread
+                if not User.objects.filter(id=participant_id).exists():
+                    return response.Response(
+                        {"detail": "Participant not found"},
+                        status=status.HTTP_404_NOT_FOUND,
+                    )
                 # Create new thread if doesn't exist
                 thread = self.service.create_thread_with_participant(
                     creator_id=request.user.id, participant_id=participant_id
@@ -141,10 +143,11 @@ class ThreadListCreateAPI(generics.ListCreateAPIView):
 class ThreadDetailAPI(generics.DestroyAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = ThreadReadSerializer
+    service = ThreadService
     queryset = Thread.objects.all()
 
     def check_object_permissions(self, request, obj: Thread):
-        if not obj.participants.filter(id=request.user.id).exists():
+        if not self.service.check_thread_participant(obj.id, request.user.id):
             self.permission_denied(
                 request,
                 message="You don't have permission to delete this thread",
@@ -166,8 +169,8 @@ class ThreadDetailAPI(generics.DestroyAPIView):
         operation_id="delete_thread",
     )
     def delete(self, request, *args, **kwargs):
+        # get_object() already runs check_object_permissions
         instance = self.get_object()
-        self.check_object_permissions(request, instance)
         self.perform_destroy(instance)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -175,7 +178,7 @@ class ThreadDetailAPI(generics.DestroyAPIView):
 @extend_schema(tags=["messages"])
 class MessageListCreateAPI(generics.ListCreateAPIView):
     permission_classes = (IsAuthenticated,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = MessageCursorPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     ordering_fields = ["created"]
     ordering = ["created"]
@@ -200,9 +203,10 @@ class MessageListCreateAPI(generics.ListCreateAPIView):
     @extend_schema(
         summary="Get thread messages with pagination",
         description="""
-        Get a paginated list of messages in a specific thread.
+        Get a cursor paginated list of messages in a specific thread.
         Messages include sender information and read status.
         Results can be ordered by creation date.
+        Use the `next` and `previous` links to move between pages.
         Only thread participants can access messages.
         """,
         parameters=[
@@ -213,10 +217,10 @@ class MessageListCreateAPI(generics.ListCreateAPIView):
                 type=int,
             ),
             OpenApiParameter(
-                name="offset",
-                description="Number of records to skip",
+                name="cursor",
+                description="Pagination cursor from the `next` or `previous` link",
                 required=False,
-                type=int,
+                type=str,
             ),
             OpenApiParameter(
                 name="ordering",
@@ -227,12 +231,13 @@ class MessageListCreateAPI(generics.ListCreateAPIView):
         ],
         responses={
             200: MessageReadSerializer,
+            400: OpenApiResponse(description="Invalid limit or unsupported offset"),
             403: OpenApiResponse(description="Not a thread participant"),
             404: OpenApiResponse(description="Thread not found"),
         },
     )
     def get(self, request, *args, **kwargs):
-        ThreadQueryParamsSerializer(data=request.query_params).is_valid(
+        MessageQueryParamsSerializer(data=request.query_params).is_valid(
             raise_exception=True
         )
         return super().get(request, *args, **kwargs)
@@ -269,6 +274,8 @@ class MessageListCreateAPI(generics.ListCreateAPIView):
             thread_id=thread_id,
             text=serializer.validated_data["text"],
         )
+        # The sender is the authenticated user, avoid fetching it again for the response
+        message.sender = request.user
 
         response_data = MessageReadSerializer(instance=message).data
         return response.Response(response_data, status=status.HTTP_201_CREATED)
@@ -297,14 +304,7 @@ class MessageListCreateAPI(generics.ListCreateAPIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Get all unread messages in thread where user is not sender
-        messages = Message.objects.filter(
-            thread_id=thread_id,
-            is_read=False
-        ).exclude(sender_id=request.user.id)
-
-        message_ids = list(messages.values_list("id", flat=True))
-        self.service.mark_messages_as_read(request.user.id, message_ids)
+        self.service.mark_thread_messages_as_read(thread_id, request.user.id)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
 
@@ -313,7 +313,8 @@ class MessageDetailAPI(generics.GenericAPIView):
     permission_classes = (IsAuthenticated,)
     serializer_class = MessageReadSerializer
     service = MessageService()
-    queryset = Message.objects.all()
+    # Only the fields needed for the permission checks
+    queryset = Message.objects.only("id", "thread_id", "sender_id")
 
     @extend_schema(
         summary="Mark specific message as read",
@@ -322,9 +323,10 @@ class MessageDetailAPI(generics.GenericAPIView):
         Only message recipients or admins can mark messages as read.
         Messages sent by the current user cannot be marked as read.
         Returns 404 if message doesn't belong to thread.
+        The read status is stored in the background shortly after the response.
         """,
         responses={
-            204: OpenApiResponse(description="Message marked as read"),
+            204: OpenApiResponse(description="Message scheduled to be marked as read"),
             403: OpenApiResponse(description="Not a recipient or message sender"),
             404: OpenApiResponse(description="Message not found or doesn't belong to thread"),
         },
@@ -346,7 +348,8 @@ class MessageDetailAPI(generics.GenericAPIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        self.service.mark_messages_as_read(request.user.id, [pk])
+        # Marks are collected and applied with one UPDATE per user
+        read_status_batcher.enqueue(request.user.id, pk)
         return response.Response(status=status.HTTP_204_NO_CONTENT)
 
 